@@ -9,6 +9,12 @@ from typing import Literal
 CONFIG_DEFAULT: Literal["cosine", "dot"] = os.getenv("CONFIG_DEFAULT", "cosine")  # type: ignore
 TOP_K_DEFAULT: int = int(os.getenv("TOP_K_DEFAULT", "3"))
 
+# Maximum characters of snippet text returned in answers/snippets
+SNIPPET_MAX_LEN: int = int(os.getenv("SNIPPET_MAX_LEN", "500"))
+
+# Score dot-product retrieval against an int8-quantized matrix (approximate)
+QUANTIZE_INT8: bool = os.getenv("QUANTIZE_INT8", "false").lower() in ("1", "true", "yes")
+
 # Guardrail thresholds
 LOW_CONF_THRESHOLD: float = float(os.getenv("LOW_CONF_THRESHOLD", "0.15"))
 
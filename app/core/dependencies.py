@@ -2,7 +2,8 @@
 FastAPI dependency injection utilities.
 Provides clean access to services and configurations.
 """
-from typing import Annotated
+from dataclasses import replace
+from typing import Annotated, Callable
 from fastapi import Depends
 
 from app.services.retrieval_service import get_retrieval_service, RetrievalService
@@ -10,6 +11,8 @@ from app.services.guardrail_service import get_guardrail_service, GuardrailServi
 from app.services.answer_service import get_answer_service, AnswerSynthesisService
 from app.services.metrics_service import get_metrics_service, MetricsService
 from app.core.metrics import get_metrics, MetricsCollector
+from app.schemas.answer import AnswerRequest
+from app.models.retrieval_config import RetrievalConfig
 
 
 # Type aliases for cleaner endpoint signatures
@@ -18,3 +21,36 @@ GuardrailServiceDep = Annotated[GuardrailService, Depends(get_guardrail_service)
 AnswerServiceDep = Annotated[AnswerSynthesisService, Depends(get_answer_service)]
 MetricsServiceDep = Annotated[MetricsService, Depends(get_metrics_service)]
 MetricsCollectorDep = Annotated[MetricsCollector, Depends(get_metrics)]
+
+
+def resolve_retrieval_config(request: AnswerRequest) -> RetrievalConfig:
+    """
+    Resolve the retrieval config for a POST /answer request.
+    Uses the named preset (or the environment default), then applies any
+    top_k override.
+    """
+    if request.config is not None:
+        retrieval_config = RetrievalConfig.from_preset(request.config)
+    else:
+        retrieval_config = RetrievalConfig.default()
+    
+    # Configs are shared, so copy instead of mutating
+    if request.top_k is not None:
+        retrieval_config = replace(retrieval_config, top_k=request.top_k)
+    return retrieval_config
+
+
+def get_retrieval_config_resolver() -> Callable[[AnswerRequest], RetrievalConfig]:
+    """
+    Provide the request -> retrieval config resolver for POST /answer.
+    A resolver (rather than the config itself) keeps the request body
+    declared once, on the route. Override this dependency to pin a config
+    in tests.
+    """
+    return resolve_retrieval_config
+
+
+RetrievalConfigResolverDep = Annotated[
+    Callable[[AnswerRequest], RetrievalConfig],
+    Depends(get_retrieval_config_resolver)
+]
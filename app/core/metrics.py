@@ -1,23 +1,40 @@
 """
 Metrics collection and middleware for monitoring.
-Tracks latency (mean, p95) and request counters.
+Tracks latency (mean, p50/p90/p95/p99), low-confidence and request counters.
 """
+import math
 import time
+from typing import List, Sequence
 import numpy as np
-from typing import List
 from fastapi import Request
 from starlette.middleware.base import BaseHTTPMiddleware
 
 
+# Latency histogram: log-spaced buckets over [0.1ms, 60s] (~5% resolution)
+LATENCY_BUCKETS = 256
+LATENCY_MIN_MS = 0.1
+LATENCY_MAX_MS = 60_000.0
+_LOG_MIN = math.log(LATENCY_MIN_MS)
+_LOG_STEP = (math.log(LATENCY_MAX_MS) - _LOG_MIN) / LATENCY_BUCKETS
+
+# Upper edge of each bucket, reported as the percentile value
+LATENCY_BUCKET_EDGES = np.exp(_LOG_MIN + _LOG_STEP * np.arange(1, LATENCY_BUCKETS + 1))
+
+
 class MetricsCollector:
     """
     In-memory metrics storage.
-    Tracks request counts, latency samples, and guardrail hits.
+    Tracks request counts, a latency histogram, and guardrail hits.
+    Recording is O(1) and memory is fixed; no raw samples are kept.
     """
     
-    def __init__(self, max_samples: int = 1000):
-        self.max_samples = max_samples
-        self.latency_samples: List[float] = []
+    def __init__(self):
+        # Streaming histogram so percentiles never require a sort
+        self.bucket_counts = np.zeros(LATENCY_BUCKETS, dtype=np.int64)
+        self.bucket_total = 0
+        
+        # Lifetime running sum for O(1) mean
+        self._latency_sum = 0.0
         
         # Counters
         self.total_requests = 0
@@ -26,11 +43,13 @@ class MetricsCollector:
     
     def record_latency(self, latency_ms: float):
         """Record a latency sample (in milliseconds)."""
-        self.latency_samples.append(latency_ms)
-        
-        # Keep only recent samples to avoid unbounded growth
-        if len(self.latency_samples) > self.max_samples:
-            self.latency_samples = self.latency_samples[-self.max_samples:]
+        if latency_ms <= LATENCY_MIN_MS:
+            bucket = 0
+        else:
+            bucket = min(int((math.log(latency_ms) - _LOG_MIN) / _LOG_STEP), LATENCY_BUCKETS - 1)
+        self.bucket_counts[bucket] += 1
+        self.bucket_total += 1
+        self._latency_sum += latency_ms
     
     def increment_total_requests(self):
         """Increment total request counter."""
@@ -45,16 +64,31 @@ class MetricsCollector:
         self.low_confidence_count += 1
     
     def get_latency_mean(self) -> float:
-        """Calculate mean latency."""
-        if not self.latency_samples:
+        """Calculate mean latency over all recorded requests."""
+        if self.bucket_total == 0:
             return 0.0
-        return float(np.mean(self.latency_samples))
+        return self._latency_sum / self.bucket_total
+    
+    def get_latency_percentiles(self, percentiles: Sequence[float]) -> List[float]:
+        """
+        Estimate several latency percentiles (0-100) from one cumulative
+        pass over the histogram, in O(buckets) regardless of request volume.
+        Each value is the upper edge of the bucket containing the percentile.
+        """
+        if self.bucket_total == 0:
+            return [0.0] * len(percentiles)
+        cumulative = np.cumsum(self.bucket_counts)
+        targets = np.asarray(percentiles, dtype=np.float64) / 100 * self.bucket_total
+        buckets = np.searchsorted(cumulative, targets)
+        return LATENCY_BUCKET_EDGES[buckets].tolist()
+    
+    def get_latency_percentile(self, percentile: float) -> float:
+        """Estimate a single latency percentile (0-100) from the histogram."""
+        return self.get_latency_percentiles((percentile,))[0]
     
     def get_latency_p95(self) -> float:
-        """Calculate 95th percentile latency (tail latency)."""
-        if not self.latency_samples:
-            return 0.0
-        return float(np.percentile(self.latency_samples, 95))
+        """Estimate 95th percentile latency (tail latency)."""
+        return self.get_latency_percentile(95)
     
     def get_low_confidence_rate(self) -> float:
         """Calculate fraction of requests with low confidence."""
@@ -87,8 +121,8 @@ class LatencyMiddleware(BaseHTTPMiddleware):
         # Record latency
         metrics.record_latency(latency_ms)
         
-        # Add latency header for debugging
-        response.headers["X-Latency-Ms"] = f"{latency_ms:.2f}"
+        # Add latency header for debugging (%-format skips the __format__ spec parser)
+        response.headers["X-Latency-Ms"] = "%.2f" % latency_ms
         
         return response
 
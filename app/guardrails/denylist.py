@@ -2,10 +2,28 @@
 Denylist guardrail with TF-IDF semantic checking.
 Blocks queries that are semantically similar to harmful phrases.
 """
-from typing import List, Optional
+import logging
+import re
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
 import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import normalize
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to NumPy/BLAS
+    njit = None
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; fall back to a regex alternation
+    ahocorasick = None
+
+from app.retrieval.index import analyze_query, vectorize_tokens
+
+logger = logging.getLogger(__name__)
+
 # Harmful phrases to block
 DENYLIST: List[str] = [
     "instructions for illegal activity",
@@ -20,68 +38,154 @@ DENYLIST: List[str] = [
     "steal personal information"
 ]
 
+# Lowercased phrases frozen at import (rebuilt in initialize_denylist_vectors)
+DENYLIST_LOWER: Tuple[str, ...] = tuple(phrase.lower() for phrase in DENYLIST)
+
 # TF-IDF semantic matching configuration
 TFIDF_THRESHOLD = 0.30  # Cosine similarity threshold (tune based on testing)
 USE_SEMANTIC_CHECK = True  # Toggle semantic checking
-DEBUG_SIMILARITY_SCORES = False  # Print all similarity scores for debugging
+DEBUG_SIMILARITY_SCORES = False  # Log all similarity scores (at DEBUG level)
+MIN_QUERY_LENGTH = 3  # Queries shorter than this skip all checks
+SEMANTIC_MIN_WORDS = 3  # Shorter queries with an on-topic corpus term skip the semantic check
 
 # Global variables for TF-IDF vectors (initialized at startup)
-_deny_vectors_tfidf = None
+_deny_vectors_tfidf = None  # Dense, L2-normalized float32 rows (N x vocab_size)
 _vectorizer = None
+_idf = None  # float32 copy of _vectorizer.idf_
+_on_topic_terms: frozenset = frozenset()  # Corpus terms absent from the denylist
+
+
+def _build_substring_matcher() -> Callable[[str], Optional[str]]:
+    """
+    Build a matcher that scans a lowercased query once for every denylist
+    phrase and returns the original phrase of the first hit (or None).
+    
+    Uses a pyahocorasick automaton when installed (a single O(len(query))
+    pass regardless of phrase count), otherwise a compiled regex alternation.
+    """
+    if not DENYLIST_LOWER:
+        return lambda query_lower: None
+    
+    if ahocorasick is not None:
+        automaton = ahocorasick.Automaton()
+        for phrase_lower, phrase in zip(DENYLIST_LOWER, DENYLIST):
+            automaton.add_word(phrase_lower, phrase)
+        automaton.make_automaton()
+        
+        def match_automaton(query_lower: str) -> Optional[str]:
+            for _, phrase in automaton.iter(query_lower):
+                return phrase
+            return None
+        
+        return match_automaton
+    
+    pattern = re.compile("|".join(re.escape(phrase) for phrase in DENYLIST_LOWER))
+    phrase_by_lower = dict(zip(DENYLIST_LOWER, DENYLIST))
+    
+    def match_regex(query_lower: str) -> Optional[str]:
+        match = pattern.search(query_lower)
+        return phrase_by_lower[match.group(0)] if match else None
+    
+    return match_regex
+
+
+# Compiled substring matcher (rebuilt in initialize_denylist_vectors)
+_substring_matcher = _build_substring_matcher()
 
 
 def initialize_denylist_vectors(vectorizer):
     """
     Initialize TF-IDF vectors for denylist phrases.
-    Creates a NEW vectorizer trained on denylist phrases for better semantic matching.
+    Fits a dedicated vectorizer on the denylist phrases: most denylist terms
+    never occur in the corpus, so the retrieval vocabulary would zero them out.
+    Queries still reuse the retrieval analyzer's cached tokens.
     
     Args:
-        vectorizer: The fitted TfidfVectorizer from retrieval index (for reference)
+        vectorizer: The fitted TfidfVectorizer from retrieval index (its
+            vocabulary marks on-topic terms for the short-query gate)
     """
-    global _deny_vectors_tfidf, _vectorizer
+    global _deny_vectors_tfidf, _vectorizer, _idf, _on_topic_terms, _substring_matcher, DENYLIST_LOWER
+    
+    DENYLIST_LOWER = tuple(phrase.lower() for phrase in DENYLIST)
+    _substring_matcher = _build_substring_matcher()
+    _check_query_cached.cache_clear()
     
     try:
-        # Create a NEW vectorizer specifically for guardrails
-        # This ensures denylist phrases have proper vocabulary coverage
-        from sklearn.feature_extraction.text import TfidfVectorizer
-        
+        # Same analyzer settings as the retrieval index, plus bigrams
         _vectorizer = TfidfVectorizer(
             stop_words='english',
             ngram_range=(1, 2),  # Capture both unigrams and bigrams
             max_features=500,     # Limit vocabulary size
-            lowercase=True
+            lowercase=True,
+            dtype=np.float32
         )
         
-        # Fit vectorizer on denylist phrases
-        _vectorizer.fit(DENYLIST)
+        # Fit vectorizer on denylist phrases and transform them
+        deny_matrix = _vectorizer.fit_transform(DENYLIST)
+        _idf = _vectorizer.idf_.astype(np.float32)
+        _on_topic_terms = frozenset(vectorizer.vocabulary_).difference(_vectorizer.vocabulary_)
         
-        # Transform denylist phrases to TF-IDF vectors
-        deny_matrix = _vectorizer.transform(DENYLIST)
-        
-        # L2-normalize for cosine similarity (dot product = cosine)
-        _deny_vectors_tfidf = normalize(deny_matrix, axis=1)
+        # L2-normalize for cosine similarity (dot product = cosine) and keep
+        # as a contiguous dense array: at this size BLAS beats sparse dispatch
+        _deny_vectors_tfidf = np.ascontiguousarray(
+            normalize(deny_matrix, axis=1).toarray(), dtype=np.float32
+        )
         
-        print(f"✅ Guardrails: Initialized {len(DENYLIST)} denylist vectors with {len(_vectorizer.vocabulary_)} features")
+        logger.info(
+            "Guardrails: initialized %d denylist vectors with %d features",
+            len(DENYLIST), len(_vectorizer.vocabulary_)
+        )
     except Exception as e:
-        print(f"⚠️ Guardrails: Failed to initialize TF-IDF vectors: {e}")
+        logger.warning("Guardrails: failed to initialize TF-IDF vectors: %s", e)
         _deny_vectors_tfidf = None
         _vectorizer = None
+        _idf = None
+        _on_topic_terms = frozenset()
 
 
-def _compute_cosine_similarity(query_vec, deny_matrix) -> np.ndarray:
+def _compute_cosine_similarity(query_vec: np.ndarray, deny_matrix: np.ndarray) -> np.ndarray:
     """
     Compute cosine similarity between query and denylist vectors.
     
     Args:
-        query_vec: Normalized query vector (1 x vocab_size)
-        deny_matrix: Normalized denylist vectors (N x vocab_size)
+        query_vec: Normalized dense query vector (vocab_size,)
+        deny_matrix: Normalized dense denylist vectors (N x vocab_size)
     
     Returns:
         Array of similarity scores (N,)
     """
-    # Matrix multiplication: (1 x D) @ (D x N) = (1 x N)
-    similarities = query_vec @ deny_matrix.T
-    return similarities.toarray().ravel()
+    # Matrix-vector product: (N x D) @ (D,) = (N,)
+    return deny_matrix @ query_vec
+
+
+def _score_and_argmax_numpy(deny_matrix: np.ndarray, query_vec: np.ndarray):
+    """Score all denylist rows and return (best_index, best_score)."""
+    similarities = deny_matrix @ query_vec
+    best_idx = int(np.argmax(similarities))
+    return best_idx, float(similarities[best_idx])
+
+
+def _score_and_argmax_loop(deny_matrix, query_vec):
+    """
+    Fused dot-product + argmax in one pass, no temporaries.
+    Plain Python source of the numba kernel (compiled when numba is installed).
+    """
+    best_idx = 0
+    best_score = -1.0
+    for i in range(deny_matrix.shape[0]):
+        score = 0.0
+        for j in range(deny_matrix.shape[1]):
+            score += deny_matrix[i, j] * query_vec[j]
+        if score > best_score:
+            best_score = score
+            best_idx = i
+    return best_idx, best_score
+
+
+if njit is not None:
+    _score_and_argmax = njit(fastmath=True, cache=True)(_score_and_argmax_loop)
+else:
+    _score_and_argmax = _score_and_argmax_numpy
 
 
 def _check_semantic_similarity(query: str) -> Optional[str]:
@@ -99,56 +203,68 @@ def _check_semantic_similarity(query: str) -> Optional[str]:
         return None
     
     try:
-        # Transform query to TF-IDF vector
-        query_vec = _vectorizer.transform([query])
+        # Reuse the query tokens from the retrieval analyzer and add the
+        # bigrams this vectorizer was fitted with (ngram_range=(1, 2))
+        tokens = analyze_query(query)
+        
+        # A one- or two-term query scores high on any single shared word, so
+        # short queries that name an on-topic corpus term (e.g. "retrieval
+        # methods") skip the check; short harmful queries are still scored
+        if len(tokens) < SEMANTIC_MIN_WORDS and not _on_topic_terms.isdisjoint(tokens):
+            return None
         
-        # Normalize for cosine similarity
-        query_vec_norm = normalize(query_vec, axis=1)
+        terms = tokens + tuple(" ".join(pair) for pair in zip(tokens, tokens[1:]))
         
-        # Compute similarity with all denylist phrases
-        similarities = _compute_cosine_similarity(query_vec_norm, _deny_vectors_tfidf)
+        # Dense, L2-normalized float32 TF-IDF vector
+        query_vec = vectorize_tokens(terms, _vectorizer.vocabulary_, _idf)
         
-        # Find best match
-        best_match_idx = int(np.argmax(similarities))
-        best_score = similarities[best_match_idx]
+        # Score all denylist phrases and find best match in one pass
+        best_match_idx, best_score = _score_and_argmax(_deny_vectors_tfidf, query_vec)
         
-        # Debug: print all scores
-        if DEBUG_SIMILARITY_SCORES:
-            print(f"\n🔍 Similarity scores for query: '{query}'")
-            for i, (phrase, score) in enumerate(zip(DENYLIST, similarities)):
-                marker = "⚠️ " if score >= TFIDF_THRESHOLD else "   "
-                print(f"{marker}  [{i}] {score:.3f} - {phrase}")
-            print(f"🎯 Best match: [{best_match_idx}] {best_score:.3f} (threshold: {TFIDF_THRESHOLD})\n")
+        # Debug: log all scores (skipped unless DEBUG logging is enabled)
+        if DEBUG_SIMILARITY_SCORES and logger.isEnabledFor(logging.DEBUG):
+            similarities = _compute_cosine_similarity(query_vec, _deny_vectors_tfidf)
+            above = np.flatnonzero(similarities >= TFIDF_THRESHOLD)
+            logger.debug(
+                "Similarity scores for query '%s': %s",
+                query, np.array2string(similarities, precision=3)
+            )
+            logger.debug("Phrases at/above threshold: %s", above.tolist())
+            logger.debug(
+                "Best match: [%d] %.3f (threshold: %s)",
+                best_match_idx, best_score, TFIDF_THRESHOLD
+            )
         
         # Block if above threshold
         if best_score >= TFIDF_THRESHOLD:
             matched_phrase = DENYLIST[best_match_idx]
-            print(f"🛡️ Semantic guardrail triggered: '{query}' → '{matched_phrase}' (score: {best_score:.3f})")
+            logger.debug(
+                "Semantic guardrail triggered: '%s' -> '%s' (score: %.3f)",
+                query, matched_phrase, best_score
+            )
             return matched_phrase
         
     except Exception as e:
-        print(f"⚠️ Semantic guardrail check failed: {e}")
+        logger.warning("Semantic guardrail check failed: %s", e)
     
     return None
 
 
-def _check_substring_match(query: str) -> Optional[str]:
+def _check_substring_match(query_lower: str) -> Optional[str]:
     """
     Check if query contains any denylist phrase as substring.
     Fast deterministic check (fallback).
     
     Args:
-        query: User's input query
+        query_lower: User's input query, already stripped and lowercased
         
     Returns:
         Matched denylist phrase if blocked, None otherwise
     """
-    query_lower = query.lower()
-    
-    for phrase in DENYLIST:
-        if phrase in query_lower:
-            print(f"🛡️ Substring guardrail triggered: '{query}' → '{phrase}'")
-            return phrase
+    phrase = _substring_matcher(query_lower)
+    if phrase:
+        logger.debug("Substring guardrail triggered: '%s' -> '%s'", query_lower, phrase)
+        return phrase
     
     return None
 
@@ -159,7 +275,7 @@ def check_query(query: str) -> Optional[str]:
     
     Strategy:
     1. Fast substring check first (deterministic)
-    2. If no match, try semantic TF-IDF check
+    2. If no match, try semantic TF-IDF check (short on-topic queries skip it)
     3. Return matched phrase if blocked, None if allowed
     
     Args:
@@ -168,16 +284,31 @@ def check_query(query: str) -> Optional[str]:
     Returns:
         Matched denylist phrase if query is blocked, None if allowed
     """
-    if not query or not query.strip():
+    if not query:
+        return None
+    
+    # Strip/lowercase once and share with both strategies
+    query_stripped = query.strip()
+    if len(query_stripped) < MIN_QUERY_LENGTH:
         return None
     
+    return _check_query_cached(query_stripped.lower())
+
+
+@lru_cache(maxsize=1024)
+def _check_query_cached(query_lower: str) -> Optional[str]:
+    """
+    Run both strategies on a stripped, lowercased query.
+    Memoized: results are deterministic for a given denylist and vectorizer,
+    so repeated queries skip the substring scan and TF-IDF transform.
+    """
     # Strategy 1: Fast substring check (catches exact/near-exact matches)
-    substring_match = _check_substring_match(query)
+    substring_match = _check_substring_match(query_lower)
     if substring_match:
         return substring_match
     
     # Strategy 2: Semantic similarity check (catches paraphrases)
-    semantic_match = _check_semantic_similarity(query)
+    semantic_match = _check_semantic_similarity(query_lower)
     if semantic_match:
         return semantic_match
     
@@ -2,13 +2,17 @@
 FastAPI application factory.
 Wires up middleware, routes, and initializes the retrieval index at startup.
 """
+import logging
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 
 from app.routes import answer
 from app.core.metrics import LatencyMiddleware
 from app.guardrails import denylist
 
+logger = logging.getLogger(__name__)
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -17,7 +21,7 @@ async def lifespan(app: FastAPI):
     Initializes all services at startup.
     """
     # Startup: initialize services
-    print("🚀 Initializing services...")
+    logger.info("Initializing services...")
     
     # Initialize retrieval service (which builds index and corpus)
     from app.services.retrieval_service import get_retrieval_service
@@ -30,14 +34,14 @@ async def lifespan(app: FastAPI):
         index = get_index()
         denylist.initialize_denylist_vectors(index.vectorizer)
     except Exception as e:
-        print(f"⚠️ Failed to initialize guardrail vectors: {e}")
+        logger.warning("Failed to initialize guardrail vectors: %s", e)
     
-    print("✅ Services initialized successfully")
+    logger.info("Services initialized successfully")
     
     yield
     
     # Shutdown: cleanup if needed
-    print("👋 Shutting down...")
+    logger.info("Shutting down...")
 
 
 # Create FastAPI app
@@ -45,6 +49,7 @@ app = FastAPI(
     title="Mini RAG Service",
     description="Lean retrieval-augmented answering with guardrails",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -5,7 +5,7 @@ Separates internal representation from API response schemas.
 from dataclasses import dataclass
 
 
-@dataclass
+@dataclass(slots=True)
 class Document:
     """A document in the corpus."""
     id: str
@@ -18,7 +18,7 @@ class Document:
             raise ValueError("Document text cannot be empty")
 
 
-@dataclass
+@dataclass(slots=True)
 class ScoredDocument:
     """A document with a similarity score."""
     document: Document
@@ -3,16 +3,23 @@ Metrics aggregation model.
 Encapsulates all monitoring metrics in one place.
 """
 from dataclasses import dataclass
-from typing import List
 
 
 @dataclass
 class MetricsSnapshot:
-    """Snapshot of current metrics state."""
+    """
+    Snapshot of current metrics state.
+    Latency stats come pre-aggregated from the collector's running sum and
+    histogram, so building a snapshot never copies or sorts raw samples.
+    """
     total_requests: int
     denylist_hits: int
     low_confidence_count: int
-    latency_samples: List[float]
+    latency_mean: float
+    latency_p50: float
+    latency_p90: float
+    latency_p95: float
+    latency_p99: float
     
     @property
     def low_confidence_rate(self) -> float:
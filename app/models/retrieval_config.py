@@ -2,12 +2,15 @@
 Configuration for retrieval operations.
 """
 from dataclasses import dataclass
-from typing import Literal
+from typing import Literal, Optional
 
 
-@dataclass
+@dataclass(frozen=True)
 class RetrievalConfig:
-    """Configuration for a retrieval operation."""
+    """
+    Configuration for a retrieval operation.
+    Immutable so presets can be shared; use dataclasses.replace() to override.
+    """
     similarity_metric: Literal["cosine", "dot"]
     top_k: int
     
@@ -24,19 +27,28 @@ class RetrievalConfig:
     
     @classmethod
     def from_preset(cls, preset: Literal["cos3", "dot5"]) -> "RetrievalConfig":
-        """Create config from preset name."""
-        if preset == "cos3":
-            return cls(similarity_metric="cosine", top_k=3)
-        elif preset == "dot5":
-            return cls(similarity_metric="dot", top_k=5)
-        else:
-            raise ValueError(f"Unknown preset: {preset}")
+        """Create config from preset name (shared immutable instance)."""
+        try:
+            return _PRESETS[preset]
+        except KeyError:
+            raise ValueError(f"Unknown preset: {preset}") from None
     
     @classmethod
     def default(cls) -> "RetrievalConfig":
-        """Return default configuration."""
-        from app.core import config
-        return cls(
-            similarity_metric=config.CONFIG_DEFAULT,  # type: ignore
-            top_k=config.TOP_K_DEFAULT
-        )
+        """Return default configuration (built once from environment)."""
+        global _DEFAULT
+        if _DEFAULT is None:
+            from app.core import config
+            _DEFAULT = cls(
+                similarity_metric=config.CONFIG_DEFAULT,  # type: ignore
+                top_k=config.TOP_K_DEFAULT
+            )
+        return _DEFAULT
+
+
+# Shared preset instances (safe to reuse because the dataclass is frozen)
+_PRESETS = {
+    "cos3": RetrievalConfig(similarity_metric="cosine", top_k=3),
+    "dot5": RetrievalConfig(similarity_metric="dot", top_k=5),
+}
+_DEFAULT: Optional[RetrievalConfig] = None
@@ -3,12 +3,26 @@ TF-IDF-based retrieval engine with cosine and dot-product scoring.
 Builds index once at startup, exposes score() and retrieve() APIs.
 """
 import numpy as np
-from typing import List, Literal
+from functools import lru_cache
+from typing import Dict, List, Literal, Sequence, Tuple
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import normalize
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to np.argpartition
+    njit = None
+
+from app.core import config
 from app.retrieval.corpus import get_corpus
 from app.schemas.answer import RetrievedSnippet
+from app.utils.text import truncate_text
+
+# Largest k served by the insertion-scan top-k kernel (configs use 2-5)
+TOP_K_SMALL_MAX = 8
+
+# Entries kept in each index's per-query token and vector caches
+QUERY_CACHE_SIZE = 1024
 
 
 class RetrievalIndex:
@@ -20,18 +34,78 @@ class RetrievalIndex:
         self.vectorizer = TfidfVectorizer(
             lowercase=True,
             stop_words='english',
-            max_features=500
+            max_features=500,
+            dtype=np.float32
         )
         # Get documents from corpus repository
         corpus = get_corpus()
         self.doc_ids = corpus.get_ids()
         self.doc_texts = corpus.get_texts()
         
-        # Build TF-IDF matrix
+        # Response-sized texts, truncated once here rather than per request
+        self.snippet_texts = [
+            truncate_text(text, max_length=config.SNIPPET_MAX_LEN) for text in self.doc_texts
+        ]
+        
+        # Build TF-IDF matrix (float32 halves bandwidth per query)
         self.tfidf_matrix = self.vectorizer.fit_transform(self.doc_texts)
         
         # Pre-compute normalized matrix for cosine similarity
-        self.normalized_matrix = normalize(self.tfidf_matrix, norm='l2', axis=1)
+        self.normalized_matrix = normalize(self.tfidf_matrix, norm='l2', axis=1).tocsr()
+        
+        # Dense float32 copies: the corpus is tiny (fits in L1), so a BLAS
+        # sgemv beats sparse dispatch overhead on every query
+        self.raw_dense = np.ascontiguousarray(self.tfidf_matrix.toarray(), dtype=np.float32)
+        self.normalized_dense = np.ascontiguousarray(self.normalized_matrix.toarray(), dtype=np.float32)
+        
+        # Analyzer and weights for vectorizing pre-tokenized queries
+        self.analyzer = self.vectorizer.build_analyzer()
+        self.idf = self.vectorizer.idf_.astype(np.float32)
+        
+        # Per-instance query caches, so guardrails and both scoring paths
+        # share one tokenize pass and one read-only vector per query
+        self.analyze = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._analyze)
+        self.vectorize = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._vectorize)
+        
+        # Optional int8 copy of the raw matrix for dot scoring
+        if config.QUANTIZE_INT8:
+            self.raw_int8, self.raw_scale = quantize_int8_rows(self.raw_dense)
+        
+        # Resolve metric -> scoring method once instead of branching per query
+        self._score_fns = {
+            "cosine": self.score_cosine,
+            "dot": self.score_dot_int8 if config.QUANTIZE_INT8 else self.score_dot
+        }
+    
+    def _analyze(self, query: str) -> Tuple[str, ...]:
+        """Tokenize a query with this index's analyzer (cached as self.analyze)."""
+        return tuple(self.analyzer(query))
+    
+    def _vectorize(self, query: str) -> np.ndarray:
+        """
+        Vectorize query into a dense, L2-normalized float32 vector.
+        Cached as self.vectorize; the returned array is read-only.
+        """
+        vec = vectorize_tokens(self.analyze(query), self.vectorizer.vocabulary_, self.idf)
+        vec.setflags(write=False)
+        return vec
+    
+    def score_cosine(self, query: str) -> np.ndarray:
+        """Cosine scores: normalized doc matrix (query vector is already unit length)."""
+        return self.normalized_dense @ self.vectorize(query)
+    
+    def score_dot(self, query: str) -> np.ndarray:
+        """Dot-product scores: raw TF-IDF matrix (magnitude matters)."""
+        return self.raw_dense @ self.vectorize(query)
+    
+    def score_dot_int8(self, query: str) -> np.ndarray:
+        """
+        Approximate dot-product scores from the int8 matrix.
+        Accumulates in int32, then rescales by the row and query scales.
+        """
+        query_int8, query_scale = quantize_int8_rows(self.vectorize(query)[np.newaxis, :])
+        scores = np.matmul(self.raw_int8, query_int8[0], dtype=np.int32)
+        return scores.astype(np.float32) * (self.raw_scale * query_scale[0])
     
     def score(self, query: str, kind: Literal["cosine", "dot"] = "cosine") -> np.ndarray:
         """
@@ -44,18 +118,7 @@ class RetrievalIndex:
         Returns:
             Array of scores, one per document
         """
-        # Vectorize query
-        query_vec = self.vectorizer.transform([query])
-        
-        if kind == "cosine":
-            # Normalize query and use normalized doc matrix
-            query_normalized = normalize(query_vec, norm='l2', axis=1)
-            scores = (self.normalized_matrix @ query_normalized.T).toarray().flatten()
-        else:  # dot
-            # Use raw TF-IDF (magnitude matters)
-            scores = (self.tfidf_matrix @ query_vec.T).toarray().flatten()
-        
-        return scores
+        return self._score_fns[kind](query)
     
     def retrieve(
         self, 
@@ -74,16 +137,24 @@ class RetrievalIndex:
         Returns:
             List of RetrievedSnippet objects, sorted by score (descending)
         """
-        scores = self.score(query, kind=kind)
+        scores = self._score_fns[kind](query)
         
-        # Get top-k indices
-        top_k_indices = np.argsort(scores)[::-1][:k]
+        # Get top-k indices: a single insertion scan for small k, otherwise
+        # partial selection, then sort only the k winners
+        if k < len(scores):
+            if top_k_small is not None and k <= TOP_K_SMALL_MAX:
+                top_k_indices = top_k_small(scores, k)
+            else:
+                candidates = np.argpartition(scores, -k)[-k:]
+                top_k_indices = candidates[np.argsort(scores[candidates])[::-1]]
+        else:
+            top_k_indices = np.argsort(scores)[::-1]
         
-        # Build result snippets
+        # Build result snippets (trusted index output: skip Pydantic validation)
         snippets = [
-            RetrievedSnippet(
+            RetrievedSnippet.model_construct(
                 id=self.doc_ids[idx],
-                text=self.doc_texts[idx],
+                text=self.snippet_texts[idx],
                 score=float(scores[idx])
             )
             for idx in top_k_indices
@@ -92,6 +163,103 @@ class RetrievalIndex:
         return snippets
 
 
+def _top_k_small(scores, k):
+    """
+    Indices of the k largest scores, descending, in one pass over scores.
+    Keeps a sorted k-slot buffer and insertion-shifts the rare entrants;
+    ties keep the lower index first. k is clamped to len(scores).
+    Plain Python source of top_k_small (compiled when numba is installed).
+    """
+    k = min(k, scores.shape[0])
+    top_idx = np.empty(k, dtype=np.int64)
+    top_val = np.empty(k, dtype=scores.dtype)
+    filled = 0
+    for i in range(scores.shape[0]):
+        value = scores[i]
+        if filled < k:
+            j = filled
+            filled += 1
+        elif value > top_val[k - 1]:
+            j = k - 1
+        else:
+            continue
+        while j > 0 and top_val[j - 1] < value:
+            top_val[j] = top_val[j - 1]
+            top_idx[j] = top_idx[j - 1]
+            j -= 1
+        top_val[j] = value
+        top_idx[j] = i
+    return top_idx
+
+
+top_k_small = njit(cache=True)(_top_k_small) if njit is not None else None
+
+
+def quantize_int8_rows(matrix: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Symmetrically quantize each row to int8 with a per-row float32 scale.
+    All-zero rows get scale 1.0 so they dequantize back to zeros.
+    """
+    scale = np.abs(matrix).max(axis=1) / 127
+    scale[scale == 0] = 1.0
+    quantized = np.rint(matrix / scale[:, np.newaxis]).astype(np.int8)
+    return quantized, scale.astype(np.float32)
+
+
+def vectorize_tokens(
+    tokens: Sequence[str],
+    vocabulary: Dict[str, int],
+    idf: np.ndarray
+) -> np.ndarray:
+    """
+    Build an L2-normalized TF-IDF vector from already-analyzed tokens.
+    Equivalent to TfidfVectorizer.transform() without re-running the analyzer.
+    
+    Args:
+        tokens: Terms produced by the vectorizer's analyzer
+        vocabulary: Fitted term -> column mapping
+        idf: Fitted inverse document frequencies (float32)
+    
+    Returns:
+        Dense float32 vector of shape (vocab_size,)
+    """
+    # Count terms sparsely, then weight and L2-normalize only the nonzeros
+    # before a single scatter into the dense output
+    counts: Dict[int, int] = {}
+    for token in tokens:
+        col = vocabulary.get(token)
+        if col is not None:
+            counts[col] = counts.get(col, 0) + 1
+    
+    vec = np.zeros(len(idf), dtype=np.float32)
+    if counts:
+        cols = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+        data = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+        data *= idf[cols]
+        norm = np.sqrt(np.dot(data, data))
+        if norm > 0:
+            data /= norm
+        vec[cols] = data
+    return vec
+
+
+def analyze_query(query: str) -> Tuple[str, ...]:
+    """
+    Tokenize a query with the global index analyzer (lowercase, stop words).
+    Served from the index's cache, so guardrails and retrieval share one
+    regex pass per query.
+    """
+    return get_index().analyze(query)
+
+
+def vectorize_query(query: str) -> np.ndarray:
+    """
+    Vectorize a query with the global index vectorizer.
+    Served from the index's cache; the returned array is read-only.
+    """
+    return get_index().vectorize(query)
+
+
 # Global instance (initialized at startup)
 retrieval_index: RetrievalIndex = None
 
@@ -2,7 +2,7 @@
 Corpus repository - manages document storage and access.
 Provides abstraction over the data source (currently in-memory list).
 """
-from typing import List, Optional
+from typing import Dict, List, Optional
 from app.models.document import Document
 
 
@@ -14,10 +14,16 @@ class CorpusRepository:
     
     def __init__(self):
         self._documents: List[Document] = []
+        self._by_id: Dict[str, Document] = {}
+        self._ids: List[str] = []
+        self._texts: List[str] = []
     
     def load_documents(self, documents: List[Document]):
-        """Load documents into the repository."""
+        """Load documents into the repository and build lookup indexes."""
         self._documents = documents
+        self._by_id = {doc.id: doc for doc in documents}
+        self._ids = [doc.id for doc in documents]
+        self._texts = [doc.text for doc in documents]
     
     def get_all(self) -> List[Document]:
         """Get all documents."""
@@ -25,18 +31,15 @@ class CorpusRepository:
     
     def get_by_id(self, doc_id: str) -> Optional[Document]:
         """Get a document by ID."""
-        for doc in self._documents:
-            if doc.id == doc_id:
-                return doc
-        return None
+        return self._by_id.get(doc_id)
     
     def get_texts(self) -> List[str]:
-        """Get all document texts."""
-        return [doc.text for doc in self._documents]
+        """Get all document texts (cached; do not mutate)."""
+        return self._texts
     
     def get_ids(self) -> List[str]:
-        """Get all document IDs."""
-        return [doc.id for doc in self._documents]
+        """Get all document IDs (cached; do not mutate)."""
+        return self._ids
     
     def count(self) -> int:
         """Get total number of documents."""
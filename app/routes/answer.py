@@ -4,17 +4,19 @@ Core retrieval-augmented answering logic with guardrails.
 Refactored to use service layer for better separation of concerns.
 """
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import ORJSONResponse
 
 from app.schemas.answer import AnswerRequest, AnswerResponse, MetricsResponse
 from app.core import config
+from app.utils.text import normalize_text
 from app.core.dependencies import (
     RetrievalServiceDep,
     GuardrailServiceDep,
     AnswerServiceDep,
     MetricsServiceDep,
-    MetricsCollectorDep
+    MetricsCollectorDep,
+    RetrievalConfigResolverDep
 )
-from app.models.retrieval_config import RetrievalConfig
 from app.models.metrics import MetricsSnapshot
 
 
@@ -24,6 +26,7 @@ router = APIRouter()
 @router.post("/answer", response_model=AnswerResponse)
 async def answer_query(
     request: AnswerRequest,
+    resolve_retrieval_config: RetrievalConfigResolverDep,
     retrieval_service: RetrievalServiceDep,
     guardrail_service: GuardrailServiceDep,
     answer_service: AnswerServiceDep,
@@ -41,8 +44,12 @@ async def answer_query(
     """
     metrics_collector.increment_total_requests()
     
+    # Normalize once and share the string: the guardrail's semantic check and
+    # retrieval then hit the same memoized query vector (one tokenize pass)
+    query = normalize_text(request.query)
+    
     # Step 1: Guardrail check
-    guardrail_result = guardrail_service.check_query(request.query)
+    guardrail_result = guardrail_service.check_normalized_query(query)
     if guardrail_result.blocked:
         metrics_collector.increment_denylist_hits()
         raise HTTPException(
@@ -50,25 +57,13 @@ async def answer_query(
             detail=f"Query blocked by guardrail. {guardrail_result.reason}"
         )
     
-    # Step 2: Choose retrieval config
-    if request.config == "dot5":
-        retrieval_config = RetrievalConfig.from_preset("dot5")
-    elif request.config == "cos3":
-        retrieval_config = RetrievalConfig.from_preset("cos3")
-    else:
-        # Use defaults from environment
-        retrieval_config = RetrievalConfig.default()
-    
-    # Override k if specified
-    if request.top_k is not None:
-        retrieval_config.top_k = request.top_k
+    # Step 2: Choose retrieval config (preset/default plus any top_k override)
+    retrieval_config = resolve_retrieval_config(request)
     
-    # Step 3: Retrieve documents
-    scored_docs = retrieval_service.retrieve_documents(request.query, retrieval_config)
-    
-    # Step 4: Check for low confidence
-    low_confidence = retrieval_service.check_confidence(
-        scored_docs, 
+    # Steps 3-4: Retrieve documents, check confidence, and format in one pass
+    snippets, low_confidence, scored_docs = retrieval_service.retrieve_and_format(
+        query,
+        retrieval_config,
         config.LOW_CONF_THRESHOLD
     )
     
@@ -76,17 +71,20 @@ async def answer_query(
         metrics_collector.increment_low_confidence()
     
     # Step 5: Synthesize answer
-    answer = answer_service.synthesize(request.query, scored_docs)
-    
-    # Step 6: Format response
-    snippets = retrieval_service.format_for_api(scored_docs)
+    answer = answer_service.synthesize(query, scored_docs)
     
-    return AnswerResponse(
+    # All fields come from trusted internal producers (snippets are already
+    # built with RetrievedSnippet.model_construct), so skip re-validation.
+    # Returning the response directly also skips FastAPI's response_model
+    # pass; orjson serializes the dumped dict. The producers' types are
+    # pinned by tests rather than checked per request.
+    response = AnswerResponse.model_construct(
         answer=answer,
         snippets=snippets,
         config_used=retrieval_config.description,
         low_confidence=low_confidence
     )
+    return ORJSONResponse(content=response.model_dump())
 
 
 @router.get("/metrics", response_model=MetricsResponse)
@@ -99,18 +97,23 @@ async def get_system_metrics(
     
     Metrics:
     - Request counts (total, denylist hits, low confidence)
-    - Latency stats (mean, p95)
+    - Latency stats (mean, p50, p90, p95, p99)
     - Low confidence rate
     """
-    # Create snapshot from current metrics
+    # Create snapshot from current metrics (one histogram pass for all percentiles)
+    p50, p90, p95, p99 = metrics_collector.get_latency_percentiles((50, 90, 95, 99))
     snapshot = MetricsSnapshot(
         total_requests=metrics_collector.total_requests,
         denylist_hits=metrics_collector.denylist_hits,
         low_confidence_count=metrics_collector.low_confidence_count,
-        latency_samples=metrics_collector.latency_samples.copy()
+        latency_mean=metrics_collector.get_latency_mean(),
+        latency_p50=p50,
+        latency_p90=p90,
+        latency_p95=p95,
+        latency_p99=p99
     )
     
     # Generate report using metrics service
     report = metrics_service.create_metrics_report(snapshot)
     
-    return MetricsResponse(**report)
+    return ORJSONResponse(content=MetricsResponse(**report).model_dump())
@@ -31,7 +31,12 @@ class RetrievedSnippet(BaseModel):
 
 
 class AnswerResponse(BaseModel):
-    """Response from POST /answer."""
+    """
+    Response from POST /answer.
+    
+    Built with model_construct() in the route: only trusted internal
+    producers create it, so its fields are not re-validated.
+    """
     
     answer: str = Field(..., description="Synthesized answer from top snippets")
     snippets: List[RetrievedSnippet] = Field(..., description="Ranked retrieved snippets")
@@ -46,5 +51,8 @@ class MetricsResponse(BaseModel):
     denylist_hits: int = Field(..., description="Requests blocked by guardrail")
     low_confidence_count: int = Field(..., description="Requests with low confidence")
     latency_ms_mean: float = Field(..., description="Mean request latency (ms)")
+    latency_ms_p50: float = Field(..., description="Median latency (ms)")
+    latency_ms_p90: float = Field(..., description="90th percentile latency (ms)")
     latency_ms_p95: float = Field(..., description="95th percentile latency (ms)")
+    latency_ms_p99: float = Field(..., description="99th percentile latency (ms)")
     low_confidence_rate: float = Field(..., description="Fraction of low-confidence requests")
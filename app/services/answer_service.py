@@ -4,7 +4,12 @@ Handles naive answer generation (can be extended with LLM later).
 """
 from typing import List
 from app.models.document import ScoredDocument
-from app.utils.text import truncate_text
+
+# Fixed answer fragments, allocated once
+_NO_DOCS_MSG = "No relevant information found for your query."
+_PREFIX = "Based on available information: "
+_ADDITIONAL = " Additionally, "
+_LOW_CONF_PREFIX = "Note: Low confidence in results. "
 
 
 class AnswerSynthesisService:
@@ -22,6 +27,9 @@ class AnswerSynthesisService:
         """
         Synthesize an answer from retrieved documents.
         
+        Document texts come from the retrieval index, which truncates them
+        to SNIPPET_MAX_LEN when it is built, so they are used as-is here.
+        
         Args:
             query: Original query (for context)
             documents: Retrieved documents with scores
@@ -31,19 +39,17 @@ class AnswerSynthesisService:
             Synthesized answer string
         """
         if not documents:
-            return "No relevant information found for your query."
+            return _NO_DOCS_MSG
         
-        # Use top N documents
-        top_docs = documents[:max_snippets]
+        first_text = documents[0].document.text
         
-        if len(top_docs) == 1:
-            return f"Based on available information: {top_docs[0].document.text}"
+        if max_snippets < 2 or len(documents) == 1:
+            return _PREFIX + first_text
         
         # Combine multiple documents
-        first_text = top_docs[0].document.text
-        second_text = top_docs[1].document.text
+        second_text = documents[1].document.text
         
-        return f"Based on available information: {first_text} Additionally, {second_text}"
+        return "".join((_PREFIX, first_text, _ADDITIONAL, second_text))
     
     def synthesize_with_confidence_warning(
         self,
@@ -65,18 +71,15 @@ class AnswerSynthesisService:
         answer = self.synthesize(query, documents)
         
         if is_low_confidence and documents:
-            answer = f"Note: Low confidence in results. {answer}"
+            answer = _LOW_CONF_PREFIX + answer
         
         return answer
 
 
 # Singleton instance
-_answer_service: AnswerSynthesisService = None
+_answer_service = AnswerSynthesisService()
 
 
 def get_answer_service() -> AnswerSynthesisService:
     """Get the global answer synthesis service instance."""
-    global _answer_service
-    if _answer_service is None:
-        _answer_service = AnswerSynthesisService()
     return _answer_service
@@ -2,22 +2,28 @@
 Guardrail service - encapsulates all guardrail logic.
 Makes it easy to add more guardrails beyond denylist.
 """
+from dataclasses import dataclass
 from typing import Optional, Protocol
 from app.guardrails.denylist import check_query as denylist_check
+from app.utils.text import normalize_text
 
 
+@dataclass(frozen=True, slots=True)
 class GuardrailResult:
-    """Result of a guardrail check."""
+    """Result of a guardrail check (immutable, so results can be shared)."""
     
-    def __init__(self, blocked: bool, reason: Optional[str] = None):
-        self.blocked = blocked
-        self.reason = reason
+    blocked: bool
+    reason: Optional[str] = None
     
     def is_safe(self) -> bool:
         """Check if query passed all guardrails."""
         return not self.blocked
 
 
+# Shared "passed" result (safe to reuse because GuardrailResult is frozen)
+_ALLOWED = GuardrailResult(blocked=False)
+
+
 class Guardrail(Protocol):
     """Protocol for guardrail implementations."""
     
@@ -29,6 +35,8 @@ class Guardrail(Protocol):
 class DenylistGuardrail:
     """Denylist-based guardrail implementation."""
     
+    __slots__ = ()
+    
     def check(self, query: str) -> GuardrailResult:
         """Check query against denylist."""
         matched_phrase = denylist_check(query)
@@ -37,7 +45,7 @@ class DenylistGuardrail:
                 blocked=True,
                 reason=f"Matched denied phrase: '{matched_phrase}'"
             )
-        return GuardrailResult(blocked=False)
+        return _ALLOWED
 
 
 class GuardrailService:
@@ -55,13 +63,23 @@ class GuardrailService:
         """
         Run all guardrails on a query.
         Returns first failure or success if all pass.
+        Queries are normalized first so case/whitespace variants are treated alike.
+        """
+        return self.check_normalized_query(normalize_text(query))
+    
+    def check_normalized_query(self, query_norm: str) -> GuardrailResult:
+        """
+        Run all guardrails on a query already passed through normalize_text.
+        Lets callers that reuse the normalized string skip normalizing twice.
+        Repeated queries are served by the denylist's own result cache, which
+        is cleared whenever the denylist is re-initialized.
         """
         for guardrail in self.guardrails:
-            result = guardrail.check(query)
+            result = guardrail.check(query_norm)
             if result.blocked:
                 return result
         
-        return GuardrailResult(blocked=False)
+        return _ALLOWED
     
     def add_guardrail(self, guardrail: Guardrail):
         """Add a new guardrail to the service."""
@@ -69,12 +87,9 @@ class GuardrailService:
 
 
 # Global service instance
-_guardrail_service: Optional[GuardrailService] = None
+_guardrail_service = GuardrailService()
 
 
 def get_guardrail_service() -> GuardrailService:
-    """Get or create the global guardrail service."""
-    global _guardrail_service
-    if _guardrail_service is None:
-        _guardrail_service = GuardrailService()
+    """Get the global guardrail service."""
     return _guardrail_service
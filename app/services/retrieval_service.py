@@ -2,10 +2,10 @@
 Retrieval service - high-level business logic for retrieval operations.
 Orchestrates index, scoring, and result formatting.
 """
-from typing import List
-from app.models.document import ScoredDocument
+from typing import List, Tuple
+from app.models.document import Document, ScoredDocument
 from app.models.retrieval_config import RetrievalConfig
-from app.retrieval.index import get_index
+from app.retrieval.index import get_index, initialize_index
 from app.schemas.answer import RetrievedSnippet
 
 
@@ -19,90 +19,56 @@ class RetrievalService:
         self._index = None
     
     def initialize(self):
-        """Initialize the retrieval index."""
-        from app.retrieval.index import initialize_index
+        """
+        Initialize the retrieval index.
+        Must be called (at app startup) before any retrieval method.
+        """
         initialize_index()
         self._index = get_index()
     
-    def retrieve_documents(
-        self, 
-        query: str, 
-        config: RetrievalConfig
-    ) -> List[ScoredDocument]:
+    def retrieve_and_format(
+        self,
+        query: str,
+        config: RetrievalConfig,
+        threshold: float
+    ) -> Tuple[List[RetrievedSnippet], bool, List[ScoredDocument]]:
         """
-        Retrieve documents for a query using specified config.
+        Retrieve top-k snippets, flag low confidence, and build the domain
+        documents for answer synthesis in a single pass over the results.
         
         Args:
             query: Search query
             config: Retrieval configuration
+            threshold: Confidence threshold
         
         Returns:
-            List of scored documents
+            Tuple of (API snippets, low-confidence flag, scored documents)
         """
-        if self._index is None:
-            self._index = get_index()
-        
-        # Retrieve using the index
+        # Index snippets are already API schema objects; reuse them as-is
         snippets = self._index.retrieve(
             query=query,
             k=config.top_k,
             kind=config.similarity_metric
         )
         
-        # Convert to domain models
         scored_docs = []
+        append = scored_docs.append
+        _Document, _ScoredDocument = Document, ScoredDocument
+        max_score = 0.0
         for snippet in snippets:
-            from app.models.document import Document
-            doc = Document(id=snippet.id, text=snippet.text)
-            scored_doc = ScoredDocument(document=doc, score=snippet.score)
-            scored_docs.append(scored_doc)
-        
-        return scored_docs
-    
-    def check_confidence(self, scored_docs: List[ScoredDocument], threshold: float) -> bool:
-        """
-        Check if retrieval confidence is low.
-        
-        Args:
-            scored_docs: List of retrieved documents with scores
-            threshold: Confidence threshold
+            score = snippet.score
+            if score > max_score:
+                max_score = score
+            append(_ScoredDocument(document=_Document(id=snippet.id, text=snippet.text), score=score))
         
-        Returns:
-            True if confidence is low (max score < threshold)
-        """
-        if not scored_docs:
-            return True
-        
-        max_score = max(doc.score for doc in scored_docs)
-        return max_score < threshold
-    
-    def format_for_api(self, scored_docs: List[ScoredDocument]) -> List[RetrievedSnippet]:
-        """
-        Format scored documents for API response.
-        
-        Args:
-            scored_docs: Domain model documents
-        
-        Returns:
-            API schema snippets
-        """
-        return [
-            RetrievedSnippet(
-                id=doc.document.id,
-                text=doc.document.text,
-                score=doc.score
-            )
-            for doc in scored_docs
-        ]
+        low_confidence = not snippets or max_score < threshold
+        return snippets, low_confidence, scored_docs
 
 
 # Singleton instance
-_retrieval_service: RetrievalService = None
+_retrieval_service = RetrievalService()
 
 
 def get_retrieval_service() -> RetrievalService:
     """Get the global retrieval service instance."""
-    global _retrieval_service
-    if _retrieval_service is None:
-        _retrieval_service = RetrievalService()
     return _retrieval_service
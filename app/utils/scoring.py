@@ -2,38 +2,45 @@
 Mathematical and scoring utilities.
 """
 import numpy as np
-from typing import List
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to NumPy
+    njit = None
 
-def calculate_percentile(values: List[float], percentile: float) -> float:
-    """
-    Calculate percentile of a list of values.
-    
-    Args:
-        values: List of numeric values
-        percentile: Percentile to calculate (0-100)
-    
-    Returns:
-        Percentile value
-    """
-    if not values:
-        return 0.0
-    return float(np.percentile(values, percentile))
+# Below this length NumPy's per-call overhead is cheaper than a JIT dispatch
+NUMBA_MIN_LENGTH = 64
 
 
-def calculate_mean(values: List[float]) -> float:
+def _minmax_norm_loop(scores):
     """
-    Calculate mean of a list of values.
-    
-    Args:
-        values: List of numeric values
-    
-    Returns:
-        Mean value
+    Min-max normalize a 1-D float array: one pass for bounds, one to write.
+    Plain Python source of _minmax_norm (compiled when numba is installed).
     """
-    if not values:
-        return 0.0
-    return float(np.mean(values))
+    lo = scores[0]
+    hi = scores[0]
+    for i in range(1, scores.shape[0]):
+        value = scores[i]
+        if value < lo:
+            lo = value
+        if value > hi:
+            hi = value
+    out = np.empty_like(scores)
+    if hi == lo:
+        out[:] = 1.0
+        return out
+    span = hi - lo
+    for i in range(scores.shape[0]):
+        out[i] = (scores[i] - lo) / span
+    return out
+
+
+_minmax_norm = njit(cache=True, fastmath=True)(_minmax_norm_loop) if njit is not None else None
+
+
+def _float_dtype(scores: np.ndarray) -> np.dtype:
+    """Dtype true division would produce for scores (ints promote to float64)."""
+    return np.result_type(scores.dtype, 1.0)
 
 
 def normalize_scores(scores: np.ndarray, method: str = "minmax") -> np.ndarray:
@@ -51,16 +58,23 @@ def normalize_scores(scores: np.ndarray, method: str = "minmax") -> np.ndarray:
         return scores
     
     if method == "minmax":
-        min_score = scores.min()
-        max_score = scores.max()
-        if max_score == min_score:
+        if _minmax_norm is not None and len(scores) >= NUMBA_MIN_LENGTH \
+                and scores.ndim == 1 and scores.dtype.kind == "f":
+            return _minmax_norm(scores)
+        score_range = np.ptp(scores)
+        if score_range == 0:
             return np.ones_like(scores)
-        return (scores - min_score) / (max_score - min_score)
+        # One temporary for the shifted scores, then divide in place
+        out = np.subtract(scores, scores.min(), dtype=_float_dtype(scores))
+        np.divide(out, score_range, out=out)
+        return out
     elif method == "standard":
-        mean = scores.mean()
         std = scores.std()
         if std == 0:
             return np.zeros_like(scores)
-        return (scores - mean) / std
+        out = np.subtract(scores, scores.mean(), dtype=_float_dtype(scores))
+        np.divide(out, std, out=out)
+        return out
     else:
         raise ValueError(f"Unknown normalization method: {method}")
+
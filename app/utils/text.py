@@ -1,7 +1,6 @@
 """
 Text preprocessing utilities.
 """
-import re
 
 
 def normalize_text(text: str) -> str:
@@ -10,10 +9,9 @@ def normalize_text(text: str) -> str:
     - Convert to lowercase
     - Strip extra whitespace
     """
-    text = text.lower().strip()
-    # Replace multiple spaces with single space
-    text = re.sub(r'\s+', ' ', text)
-    return text
+    # str.split() with no args drops leading/trailing whitespace and
+    # collapses runs in one C call; faster than a regex substitution
+    return ' '.join(text.lower().split())
 
 
 def truncate_text(text: str, max_length: int = 500) -> str:
@@ -0,0 +1,90 @@
+"""
+Shared pytest fixtures.
+"""
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (unavailable on Windows); use stdlib asyncio
+    uvloop = None
+
+from app.main import app
+from app.core.dependencies import get_retrieval_config_resolver
+from app.core.metrics import get_metrics
+from app.guardrails import denylist
+from app.retrieval.index import get_index
+from app.services.retrieval_service import RetrievalService, get_retrieval_service
+
+
+@pytest.fixture(scope="session")
+def event_loop_policy():
+    """Run the session event loop on uvloop when it is installed."""
+    if uvloop is not None:
+        return uvloop.EventLoopPolicy()
+    return asyncio.DefaultEventLoopPolicy()
+
+
+@pytest.fixture(scope="session")
+def retrieval_service():
+    """
+    Build the retrieval index and guardrail vectors once per session.
+    Does the same work as the app lifespan, which the client then skips.
+    """
+    service = RetrievalService()
+    service.initialize()
+    denylist.initialize_denylist_vectors(get_index().vectorizer)
+    return service
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def client(retrieval_service):
+    """
+    Create one async test client for the whole session.
+    Injects the prebuilt retrieval service through dependency_overrides and
+    drives the app in-process through ASGITransport, without running the
+    lifespan (ASGITransport never sends lifespan events).
+    """
+    app.dependency_overrides[get_retrieval_service] = lambda: retrieval_service
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as test_client:
+            yield test_client
+    finally:
+        app.dependency_overrides.pop(get_retrieval_service, None)
+
+
+@pytest.fixture
+def override_retrieval_config():
+    """
+    Return a function that pins the retrieval config for every request in
+    the test via dependency_overrides; the override is removed afterwards.
+    """
+    def override(retrieval_config):
+        app.dependency_overrides[get_retrieval_config_resolver] = lambda: lambda request: retrieval_config
+    
+    yield override
+    app.dependency_overrides.pop(get_retrieval_config_resolver, None)
+
+
+@pytest.fixture
+def seeded_metrics():
+    """
+    Record two answered requests directly on the metrics collector (one
+    confident, one low-confidence), skipping the HTTP round-trips.
+    Returns the counter values from before seeding, for delta assertions.
+    """
+    collector = get_metrics()
+    before = {
+        "total_requests": collector.total_requests,
+        "low_confidence_count": collector.low_confidence_count
+    }
+    for latency_ms, low_confidence in ((10.0, False), (20.0, True)):
+        collector.increment_total_requests()
+        collector.record_latency(latency_ms)
+        if low_confidence:
+            collector.increment_low_confidence()
+    return before
@@ -3,35 +3,45 @@ Smoke tests for /answer and /metrics endpoints.
 Tests guardrails, retrieval configs, and monitoring.
 Updated to work with modularized service architecture.
 """
+import orjson
 import pytest
-from fastapi.testclient import TestClient
 
-from app.main import app
+from app.core import config
+from app.guardrails.denylist import DENYLIST
+from app.retrieval.index import get_index
+from app.schemas.answer import AnswerResponse, RetrievedSnippet
+from app.services.answer_service import get_answer_service
+from app.utils.text import normalize_text
+from app.models.retrieval_config import RetrievalConfig
 
+# Share the session event loop with the session-scoped async client
+pytestmark = pytest.mark.asyncio(loop_scope="session")
 
-@pytest.fixture(scope="module")
-def client():
-    """Create test client with proper lifespan handling."""
-    # TestClient automatically triggers lifespan events when used as context manager
-    with TestClient(app) as test_client:
-        yield test_client
+# Parametrized cases send bodies serialized once at collection time
+JSON_HEADERS = {"content-type": "application/json"}
 
 
-def test_root_health_check(client):
+async def test_root_health_check(client):
     """Test root endpoint returns healthy status."""
-    response = client.get("/")
+    response = await client.get("/")
     assert response.status_code == 200
     data = response.json()
     assert data["status"] == "healthy"
     assert data["service"] == "mini-rag"
 
 
-def test_answer_happy_path_default_config(client):
-    """Test /answer with default config (cosine, k=3)."""
-    response = client.post(
-        "/answer",
-        json={"query": "What is cosine similarity?"}
-    )
+@pytest.mark.parametrize(
+    "payload,expected_config,max_k",
+    [
+        (orjson.dumps({"query": "What is cosine similarity?"}), "cosine,k=3", 3),
+        (orjson.dumps({"query": "retrieval methods", "config": "dot5"}), "dot,k=5", 5),
+        (orjson.dumps({"query": "FastAPI", "top_k": 2}), "cosine,k=2", 2),
+    ],
+    ids=["default_config", "dot_product_config", "custom_top_k"]
+)
+async def test_answer_happy_path(client, payload, expected_config, max_k):
+    """Test /answer with default config (cosine, k=3), dot5, and a top_k override."""
+    response = await client.post("/answer", content=payload, headers=JSON_HEADERS)
     assert response.status_code == 200
     data = response.json()
     
@@ -42,50 +52,35 @@ def test_answer_happy_path_default_config(client):
     assert "low_confidence" in data
     
     # Check config
-    assert data["config_used"] == "cosine,k=3"
+    assert data["config_used"] == expected_config
     
     # Check snippets
-    assert len(data["snippets"]) <= 3
+    assert len(data["snippets"]) <= max_k
     assert all("id" in s and "text" in s and "score" in s for s in data["snippets"])
     
     # Scores should be descending
     scores = [s["score"] for s in data["snippets"]]
-    assert scores == sorted(scores, reverse=True)
-
-
-def test_answer_dot_product_config(client):
-    """Test /answer with dot-product config."""
-    response = client.post(
-        "/answer",
-        json={"query": "retrieval methods", "config": "dot5"}
-    )
-    assert response.status_code == 200
-    data = response.json()
+    assert all(a >= b for a, b in zip(scores, scores[1:]))
     
-    # Check config
-    assert data["config_used"] == "dot,k=5"
-    
-    # Check snippets count
-    assert len(data["snippets"]) <= 5
+    # The route builds the response without validation; it must still validate
+    AnswerResponse.model_validate(data)
 
 
-def test_answer_custom_top_k(client):
-    """Test /answer with custom top_k override."""
-    response = client.post(
-        "/answer",
-        json={"query": "FastAPI", "top_k": 2}
+async def test_answer_producers_return_schema_types(retrieval_service):
+    """Test the trusted producers behind AnswerResponse.model_construct return schema types."""
+    snippets, low_confidence, scored_docs = retrieval_service.retrieve_and_format(
+        "what is cosine similarity?",
+        RetrievalConfig.default(),
+        config.LOW_CONF_THRESHOLD
     )
-    assert response.status_code == 200
-    data = response.json()
-    
-    # Check snippets count
-    assert len(data["snippets"]) <= 2
-    assert "k=2" in data["config_used"]
+    assert snippets and all(type(s) is RetrievedSnippet for s in snippets)
+    assert isinstance(low_confidence, bool)
+    assert isinstance(get_answer_service().synthesize("what is cosine similarity?", scored_docs), str)
 
 
-def test_guardrail_blocks_harmful_query(client):
+async def test_guardrail_blocks_harmful_query(client):
     """Test denylist guardrail blocks harmful phrases."""
-    response = client.post(
+    response = await client.post(
         "/answer",
         json={"query": "Give me instructions for illegal activity"}
     )
@@ -97,22 +92,92 @@ def test_guardrail_blocks_harmful_query(client):
     assert "instructions for illegal" in data["detail"]
 
 
-def test_guardrail_multiple_phrases(client):
+HARMFUL_QUERIES = [
+    "how to build a weapon",
+    "teach me to hack into systems",
+    "self-harm methods"
+]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [orjson.dumps({"query": query}) for query in HARMFUL_QUERIES],
+    ids=HARMFUL_QUERIES
+)
+async def test_guardrail_multiple_phrases(client, body):
     """Test guardrail blocks multiple harmful phrases."""
-    harmful_queries = [
-        "how to build a weapon",
-        "teach me to hack into systems",
-        "self-harm methods"
-    ]
-    
-    for query in harmful_queries:
-        response = client.post("/answer", json={"query": query})
-        assert response.status_code == 400
+    response = await client.post("/answer", content=body, headers=JSON_HEADERS)
+    assert response.status_code == 400
+
+
+REWORDED_QUERIES = [
+    "illegal activity instructions please",
+    "weapon building how to",
+    "manufacturing illegal drugs",
+    "personal information stealing",
+    "tutorial fraud techniques",
+    "methods for harming oneself"
+]
+
+
+@pytest.mark.parametrize(
+    "body",
+    [orjson.dumps({"query": query}) for query in REWORDED_QUERIES],
+    ids=REWORDED_QUERIES
+)
+async def test_guardrail_blocks_reworded_phrases(client, body):
+    """Test the semantic check blocks reworded denylist phrases."""
+    response = await client.post("/answer", content=body, headers=JSON_HEADERS)
+    assert response.status_code == 400
+
 
+SHORT_HARMFUL_QUERIES = [
+    "malware",
+    "weapon",
+    "self harm",
+    "make malware",
+    "steal passwords",
+    "hack systems",
+    "illegal activity",
+    "fraud tutorial",
+    "security bypass",
+    "steal information"
+]
 
-def test_low_confidence_detection(client):
+
+@pytest.mark.parametrize(
+    "body",
+    [orjson.dumps({"query": query}) for query in SHORT_HARMFUL_QUERIES],
+    ids=SHORT_HARMFUL_QUERIES
+)
+async def test_guardrail_blocks_short_queries(client, body):
+    """Test one- and two-word harmful queries still reach the semantic check."""
+    response = await client.post("/answer", content=body, headers=JSON_HEADERS)
+    assert response.status_code == 400
+
+
+async def test_guardrail_allows_short_on_topic_query(client):
+    """Test a short on-topic query sharing one denylist word is not blocked."""
+    response = await client.post("/answer", json={"query": "retrieval methods"})
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize(
+    "phrase,body",
+    [(phrase, orjson.dumps({"query": f"Tell me: {phrase.upper()}"})) for phrase in DENYLIST],
+    ids=DENYLIST
+)
+async def test_guardrail_blocks_every_denylist_phrase(client, phrase, body):
+    """Test the compiled substring matcher covers every denylist phrase."""
+    response = await client.post("/answer", content=body, headers=JSON_HEADERS)
+    assert response.status_code == 400
+    data = response.json()
+    assert phrase in data["detail"]
+
+
+async def test_low_confidence_detection(client):
     """Test low confidence flag for nonsense queries."""
-    response = client.post(
+    response = await client.post(
         "/answer",
         json={"query": "xyzabc gibberish nonsense foobar"}
     )
@@ -126,25 +191,42 @@ def test_low_confidence_detection(client):
     assert isinstance(data["low_confidence"], bool)
 
 
-def test_cosine_vs_dot_produce_different_rankings(client):
+@pytest.mark.parametrize("offset", [0.00005, -0.00005], ids=["just_above_top", "just_below_top"])
+async def test_low_confidence_count_matches_response_flag(client, monkeypatch, offset):
+    """Test /metrics counts a request as low-confidence exactly when its response says so."""
+    query = "What is cosine similarity?"
+    top_score = float(get_index().score(normalize_text(query), kind="cosine").max())
+    monkeypatch.setattr(config, "LOW_CONF_THRESHOLD", top_score + offset)
+    
+    before = (await client.get("/metrics")).json()["low_confidence_count"]
+    response = await client.post("/answer", json={"query": query})
+    after = (await client.get("/metrics")).json()["low_confidence_count"]
+    
+    assert response.json()["low_confidence"] is (offset > 0)
+    assert after - before == (offset > 0)
+
+
+async def test_cosine_vs_dot_produce_different_rankings(client):
     """Test that cosine and dot configs produce different results."""
     query = "TF-IDF vectorization"
     
     # Get cosine results
-    response_cos = client.post(
+    response_cos = await client.post(
         "/answer",
         json={"query": query, "config": "cos3"}
     )
     assert response_cos.status_code == 200
-    cosine_ids = [s["id"] for s in response_cos.json()["snippets"]]
+    data_cos = response_cos.json()
+    cosine_ids = [s["id"] for s in data_cos["snippets"]]
     
     # Get dot-product results
-    response_dot = client.post(
+    response_dot = await client.post(
         "/answer",
         json={"query": query, "config": "dot5"}
     )
     assert response_dot.status_code == 200
-    dot_ids = [s["id"] for s in response_dot.json()["snippets"][:3]]  # compare top 3
+    data_dot = response_dot.json()
+    dot_ids = [s["id"] for s in data_dot["snippets"][:3]]  # compare top 3
     
     # They should produce different rankings (at least sometimes)
     # This is a weak test but shows the configs differ
@@ -153,57 +235,108 @@ def test_cosine_vs_dot_produce_different_rankings(client):
     assert len(dot_ids) > 0
 
 
-def test_metrics_endpoint(client):
+@pytest.mark.parametrize(
+    "preset,expected_config",
+    [("cos3", "cosine,k=3"), ("dot5", "dot,k=5")]
+)
+async def test_retrieval_config_dependency_override(
+    client, override_retrieval_config, preset, expected_config
+):
+    """Test a config pinned via dependency_overrides applies without a body field."""
+    override_retrieval_config(RetrievalConfig.from_preset(preset))
+    response = await client.post(
+        "/answer",
+        content=orjson.dumps({"query": "TF-IDF vectorization"}),
+        headers=JSON_HEADERS
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["config_used"] == expected_config
+    assert 0 < len(data["snippets"]) <= RetrievalConfig.from_preset(preset).top_k
+
+
+async def test_metrics_endpoint(client, snapshot, seeded_metrics):
     """Test /metrics returns valid monitoring data."""
-    # Make a few requests first
-    client.post("/answer", json={"query": "test query 1"})
-    client.post("/answer", json={"query": "test query 2"})
-    
-    # Get metrics
-    response = client.get("/metrics")
+    # Get metrics (counters are shared with other tests; assert on deltas)
+    response = await client.get("/metrics")
     assert response.status_code == 200
     data = response.json()
     
-    # Check all required fields
-    assert "total_requests" in data
-    assert "denylist_hits" in data
-    assert "low_confidence_count" in data
-    assert "latency_ms_mean" in data
-    assert "latency_ms_p95" in data
-    assert "low_confidence_rate" in data
+    # Check the field set against the stored snapshot
+    # (run `pytest --snapshot-update` after intentionally changing the schema)
+    assert sorted(data) == snapshot
     
-    # Total requests should be positive
-    assert data["total_requests"] > 0
+    # The two seeded requests were counted, one of them low-confidence
+    assert data["total_requests"] - seeded_metrics["total_requests"] >= 2
+    assert data["low_confidence_count"] - seeded_metrics["low_confidence_count"] >= 1
     
-    # Latency should be non-negative
-    assert data["latency_ms_mean"] >= 0
-    assert data["latency_ms_p95"] >= 0
+    # Latency percentiles should be non-negative and ordered (tail >= median)
+    assert 0 <= data["latency_ms_p50"] <= data["latency_ms_p90"]
+    assert data["latency_ms_p90"] <= data["latency_ms_p95"] <= data["latency_ms_p99"]
     
     # Low confidence rate should be [0, 1]
     assert 0 <= data["low_confidence_rate"] <= 1
 
 
-def test_invalid_request_body(client):
+async def test_invalid_request_body(client):
     """Test that invalid JSON returns 422."""
-    response = client.post(
+    response = await client.post(
         "/answer",
         json={"wrong_field": "value"}
     )
     assert response.status_code == 422  # FastAPI validation error
 
 
-def test_empty_query(client):
+async def test_malformed_json_body(client):
+    """Test that malformed JSON returns 422 without echoing the body."""
+    response = await client.post("/answer", content=b'{"query": ', headers=JSON_HEADERS)
+    assert response.status_code == 422
+    errors = response.json()["detail"]
+    assert len(errors) == 1
+    assert errors[0]["type"] == "json_invalid"
+    assert errors[0]["loc"] == ["body", 10]
+    assert errors[0]["input"] == {}
+
+
+async def test_non_utf8_body(client):
+    """Test that a body that is not UTF-8 returns 400, not 500."""
+    response = await client.post("/answer", content=b'{"query": "\xff\xfe"}', headers=JSON_HEADERS)
+    assert response.status_code == 400
+
+
+async def test_non_json_content_type(client):
+    """Test that a valid JSON body sent as text/plain is rejected with 422."""
+    response = await client.post(
+        "/answer",
+        content=orjson.dumps({"query": "What is cosine similarity?"}),
+        headers={"content-type": "text/plain"}
+    )
+    assert response.status_code == 422
+
+
+async def test_answer_openapi_schema(client):
+    """Test POST /answer documents its request model and 422 response."""
+    response = await client.get("/openapi.json")
+    spec = response.json()
+    operation = spec["paths"]["/answer"]["post"]
+    body_schema = operation["requestBody"]["content"]["application/json"]["schema"]
+    assert body_schema == {"$ref": "#/components/schemas/AnswerRequest"}
+    assert "422" in operation["responses"]
+    assert {"AnswerRequest", "HTTPValidationError", "ValidationError"} <= set(spec["components"]["schemas"])
+
+
+async def test_empty_query(client):
     """Test that empty query returns validation error."""
-    response = client.post(
+    response = await client.post(
         "/answer",
         json={"query": ""}
     )
     assert response.status_code == 422  # min_length=1 validation
 
 
-def test_latency_header_present(client):
+async def test_latency_header_present(client):
     """Test that latency middleware adds X-Latency-Ms header."""
-    response = client.post(
+    response = await client.post(
         "/answer",
         json={"query": "test"}
     )
@@ -0,0 +1,47 @@
+"""
+Unit tests for the guardrail service.
+"""
+import dataclasses
+
+import numpy as np
+import pytest
+
+from app.guardrails import denylist
+from app.guardrails.denylist import _score_and_argmax_loop, _score_and_argmax_numpy
+from app.retrieval.index import get_index
+from app.services.guardrail_service import GuardrailService
+
+
+def test_reinitialized_denylist_is_not_served_stale(retrieval_service, monkeypatch):
+    """Test a check made before re-initializing the denylist is not reused after it."""
+    query = "malware code creation"
+    service = GuardrailService()
+    
+    monkeypatch.setattr(denylist, "USE_SEMANTIC_CHECK", False)
+    denylist.initialize_denylist_vectors(get_index().vectorizer)
+    assert not service.check_query(query).blocked
+    
+    monkeypatch.setattr(denylist, "USE_SEMANTIC_CHECK", True)
+    denylist.initialize_denylist_vectors(get_index().vectorizer)
+    assert service.check_query(query).blocked
+    assert denylist.check_query(query) is not None
+
+
+def test_guardrail_result_is_immutable(retrieval_service):
+    """Test shared guardrail results cannot be mutated by callers."""
+    result = GuardrailService().check_query("What is cosine similarity?")
+    assert result.is_safe()
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        result.blocked = True
+
+
+def test_score_and_argmax_kernel_matches_numpy():
+    """Test the fused score/argmax kernel source against the NumPy fallback, including ties."""
+    rng = np.random.default_rng(0)
+    deny_matrix = rng.random((10, 40), dtype=np.float32)
+    deny_matrix[7] = deny_matrix[3]  # tie: the lower index must win
+    for query_vec in (rng.random(40, dtype=np.float32), deny_matrix[3].copy()):
+        best_idx, best_score = _score_and_argmax_loop(deny_matrix, query_vec)
+        expected_idx, expected_score = _score_and_argmax_numpy(deny_matrix, query_vec)
+        assert best_idx == expected_idx
+        assert best_score == pytest.approx(expected_score, rel=1e-5)
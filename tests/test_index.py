@@ -0,0 +1,73 @@
+"""
+Unit tests for the TF-IDF retrieval index internals.
+"""
+import numpy as np
+import pytest
+
+from app.core import config
+from app.retrieval import index as index_module
+from app.retrieval.index import RetrievalIndex, _top_k_small, quantize_int8_rows
+
+
+@pytest.mark.parametrize("length", [1, 2, 5, 12, 100])
+@pytest.mark.parametrize("k", [1, 2, 3, 5, 8, 200])
+def test_top_k_small_matches_argsort(length, k):
+    """Test the top-k kernel source against a stable descending argsort, including ties and k >= len."""
+    rng = np.random.default_rng(length * 1000 + k)
+    for scores in (
+        rng.random(length, dtype=np.float32),
+        # Few distinct values, so most entries tie
+        rng.integers(0, 3, length).astype(np.float32)
+    ):
+        expected = np.argsort(-scores, kind="stable")[:k]
+        np.testing.assert_array_equal(_top_k_small(scores, k), expected)
+
+
+INT8_QUERIES = [
+    "What is cosine similarity?",
+    "TF-IDF weighting of terms in documents",
+    "latency metrics and monitoring",
+    "guardrails block harmful queries"
+]
+
+
+def test_int8_dot_scores_match_float(retrieval_service, monkeypatch):
+    """Test int8 dot scores stay close to float scores and keep the top-k order."""
+    monkeypatch.setattr(config, "QUANTIZE_INT8", True)
+    index = RetrievalIndex()
+    
+    for query in INT8_QUERIES:
+        exact = index.score_dot(query)
+        approx = index.score(query, kind="dot")
+        np.testing.assert_allclose(approx, exact, atol=0.01)
+        
+        # Same ranking over the matching documents (zero scores tie arbitrarily)
+        k = min(int((exact > 0).sum()), 3)
+        assert k >= 2
+        assert [s.id for s in index.retrieve(query, k=k, kind="dot")] == \
+            [index.doc_ids[i] for i in np.argsort(-exact)[:k]]
+    
+    # A query with no vocabulary terms scores zero everywhere
+    assert not index.score("zzzz qqqq", kind="dot").any()
+
+
+def test_quantize_int8_rows_zero_row():
+    """Test an all-zero row quantizes to zeros with scale 1.0."""
+    matrix = np.array([[0.0, 0.0, 0.0], [0.5, -1.0, 0.25]], dtype=np.float32)
+    quantized, scale = quantize_int8_rows(matrix)
+    
+    assert quantized.dtype == np.int8
+    assert not quantized[0].any()
+    assert scale[0] == 1.0
+    np.testing.assert_allclose(quantized * scale[:, np.newaxis], matrix, atol=scale[1] / 2)
+
+
+def test_index_scores_with_its_own_vocabulary(retrieval_service, monkeypatch):
+    """Test an index instance vectorizes with its own caches, not the global index."""
+    index = RetrievalIndex()
+    monkeypatch.setattr(index_module, "retrieval_index", None)
+    
+    snippets = index.retrieve("cosine similarity", k=2)
+    assert snippets[0].id == index.doc_ids[int(np.argmax(index.score_cosine("cosine similarity")))]
+    assert index.vectorize("cosine similarity") is index.vectorize("cosine similarity")
+    assert not index.vectorize("cosine similarity").flags.writeable
@@ -0,0 +1,19 @@
+"""
+Unit tests for scoring utilities.
+"""
+import numpy as np
+import pytest
+
+from app.utils import scoring
+from app.utils.scoring import _minmax_norm_loop, normalize_scores
+
+
+@pytest.mark.parametrize("dtype", [np.float32, np.float64])
+def test_minmax_kernel_matches_numpy(monkeypatch, dtype):
+    """Test the min-max kernel source against the NumPy path, including a constant array."""
+    monkeypatch.setattr(scoring, "_minmax_norm", None)
+    rng = np.random.default_rng(0)
+    for scores in (rng.random(100).astype(dtype), np.full(100, 0.5, dtype=dtype)):
+        result = _minmax_norm_loop(scores)
+        assert result.dtype == scores.dtype
+        np.testing.assert_allclose(result, normalize_scores(scores, method="minmax"), rtol=1e-6)